@@ -4,12 +4,13 @@ from openpyxl.styles import PatternFill
 import requests
 import os
 import shutil
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from collections import Counter
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.platypus import Table, TableStyle, SimpleDocTemplate, Spacer, Paragraph, Image
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
@@ -23,6 +24,32 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Hardcoded Excel file path and ward number
 EXCEL_FILE = "VOTER_REG_STATUS\BLOUBERG WARD 16 MEMBERSHIP.xlsx"  # Replace with the actual path to your Excel file
 WARD_NUMBER = 93501016
+# Set to True to process a municipality/region-wide file, one register per membership ward
+REGION_MODE = False
+# Rows per chunk when reading CSV/Parquet membership extracts
+EXTRACT_CHUNKSIZE = 50000
+# Incrementally updated per-ward/per-VD aggregates of every processed ward
+ROLLUP_DB = "VOTER_REG_STATUS/rollup_index.db"
+# Voting district geography and per-ID statuses accumulated from IEC responses
+DELIMITATION_DB = "VOTER_REG_STATUS/delimitation_index.db"
+# Cached voter statuses older than this are not used in place of a live IEC answer
+CACHE_MAX_AGE_DAYS = 30
+CACHED_STATUS_COLUMN = 27
+
+STATUS_DECEASED = "DECEASED"
+STATUS_REGISTERED_IN_WARD = "Registered In Ward"
+STATUS_NOT_IN_WARD = "Not Registered In Ward"
+STATUS_NOT_REGISTERED = "Not Registered Voter"
+# Written instead of a register status when the membership ward is blank
+NO_MEMBERSHIP_WARD = "No membership ward"
+
+# Register status -> (output sheet, highlight colour)
+STATUS_SHEETS = {
+    STATUS_NOT_REGISTERED: ('NotRegisteredVoter', 'ff0000'),
+    STATUS_REGISTERED_IN_WARD: ('RegisteredInWard', '00ff00'),
+    STATUS_DECEASED: ('Deceased', 'ffff00'),
+    STATUS_NOT_IN_WARD: ('NotRegisteredInWard', '0000FF'),
+}
 
 # Register Arial Black font with fallback
 try:
@@ -74,17 +101,22 @@ def fetch_voter_data(id_number, index, access_token):
         if response.status_code == 200:
             data = response.json()
             logging.info(f"Processed ID {id_number} at index {index}")
+            voting_station = data.get('VotingStation', {}) or {}
+            delimitation = voting_station.get('Delimitation', {}) or {}
+            location = voting_station.get('Location', {}) or {}
             return {
                 'index': index,
                 'id': id_number,
                 'bRegistered': data.get('bRegistered', False),
-                'ward_id': data.get('VotingStation', {}).get('Delimitation', {}).get('WardID', None),
-                'province': data.get('VotingStation', {}).get('Delimitation', {}).get('Province', '') or '',
-                'municipality': data.get('VotingStation', {}).get('Delimitation', {}).get('Municipality', '') or '',
-                'voting_station': data.get('VotingStation', {}).get('Name', '') or '',
-                'vd_number': data.get('VotingStation', {}).get('Delimitation', {}).get('VDNumber', '') or '',
-                'suburb': data.get('VotingStation', {}).get('Location', {}).get('Suburb', '') or '',
-                'street': data.get('VotingStation', {}).get('Location', {}).get('Street', '') or ''
+                'vd_number': str(delimitation.get('VDNumber', '') or ''),
+                'delimitation': {
+                    'ward_id': delimitation.get('WardID', None),
+                    'province': delimitation.get('Province', '') or '',
+                    'municipality': delimitation.get('Municipality', '') or '',
+                    'voting_station': voting_station.get('Name', '') or '',
+                    'suburb': location.get('Suburb', '') or '',
+                    'street': location.get('Street', '') or ''
+                }
             }
         else:
             logging.error(f"Failed to retrieve data for ID {id_number}. Status code: {response.status_code}")
@@ -93,17 +125,295 @@ def fetch_voter_data(id_number, index, access_token):
         logging.error(f"Error processing ID {id_number}: {str(e)}")
         return None
 
-def copy_row_to_sheet(sheet, index, source_ws, ward_number=None):
-    """Copy all columns from source worksheet to target sheet for the given row."""
-    max_col = source_ws.max_column
-    for col in range(1, max_col + 1):
+def open_delimitation_index(db_path=DELIMITATION_DB):
+    """Open the delimitation index, creating its tables if needed."""
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS delimitation (
+            vd_number TEXT PRIMARY KEY,
+            ward INTEGER,
+            province TEXT,
+            municipality TEXT,
+            voting_station TEXT,
+            suburb TEXT,
+            street TEXT,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS voter_status (
+            id_number TEXT PRIMARY KEY,
+            registered INTEGER NOT NULL,
+            vd_number TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_delimitation_ward ON delimitation (ward);
+    """)
+    return conn
+
+def update_delimitation_index(results, db_path=DELIMITATION_DB):
+    """Store the voting district geography and compact status of freshly fetched results."""
+    now = time.time()
+    districts = {}
+    for result in results:
+        if result['vd_number'] and result.get('delimitation'):
+            districts[result['vd_number']] = result['delimitation']
+    conn = open_delimitation_index(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO delimitation VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(vd_number, d['ward_id'], d['province'], d['municipality'], d['voting_station'], d['suburb'], d['street'], now)
+                 for vd_number, d in districts.items()]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO voter_status VALUES (?, ?, ?, ?)",
+                [(result['id'], int(bool(result['bRegistered'])), result['vd_number'], now) for result in results]
+            )
+    finally:
+        conn.close()
+
+def load_delimitation_index(db_path=DELIMITATION_DB):
+    """Return the delimitation index as a dict keyed by VD number."""
+    conn = open_delimitation_index(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT vd_number, ward, province, municipality, voting_station, suburb, street FROM delimitation"
+        ).fetchall()
+    finally:
+        conn.close()
+    keys = ['ward_id', 'province', 'municipality', 'voting_station', 'suburb', 'street']
+    return {row[0]: dict(zip(keys, row[1:])) for row in rows}
+
+def load_cached_voters(id_numbers, db_path=DELIMITATION_DB, max_age_days=CACHE_MAX_AGE_DAYS, batch_size=900):
+    """Return the recent cached status of the given IDs as {id_number: {bRegistered, vd_number, cached_at}}.
+
+    Statuses older than max_age_days are ignored, since registration and deceased
+    status change over time.
+    """
+    cached = {}
+    cutoff = time.time() - max_age_days * 86400
+    conn = open_delimitation_index(db_path)
+    try:
+        for start in range(0, len(id_numbers), batch_size):
+            batch = id_numbers[start:start + batch_size]
+            placeholders = ", ".join("?" for _ in batch)
+            for id_number, registered, vd_number, updated_at in conn.execute(
+                f"SELECT id_number, registered, vd_number, updated_at FROM voter_status "
+                f"WHERE updated_at >= ? AND id_number IN ({placeholders})", [cutoff] + batch
+            ):
+                cached[id_number] = {'bRegistered': bool(registered), 'vd_number': vd_number, 'cached_at': updated_at}
+    finally:
+        conn.close()
+    return cached
+
+def resolve_voter_geography(result, delimitation_index):
+    """Fill in a compact voter result's station and ward details from the delimitation index."""
+    entry = delimitation_index.get(result['vd_number']) or result.get('delimitation') or {}
+    result.pop('delimitation', None)
+    result['ward_id'] = entry.get('ward_id')
+    for key in ['province', 'municipality', 'voting_station', 'suburb', 'street']:
+        result[key] = entry.get(key) or ''
+    return result
+
+def validate_ward_number(ward_number, db_path=DELIMITATION_DB):
+    """Return True if the ward is known to the delimitation index (or the index is still empty)."""
+    conn = open_delimitation_index(db_path)
+    try:
+        if conn.execute("SELECT 1 FROM delimitation LIMIT 1").fetchone() is None:
+            return True
+        return conn.execute("SELECT 1 FROM delimitation WHERE ward = ? LIMIT 1", (str(ward_number),)).fetchone() is not None
+    finally:
+        conn.close()
+
+def get_ward_voting_stations(ward_number, db_path=DELIMITATION_DB):
+    """Return the known voting stations of a ward from the delimitation index, sorted by name."""
+    conn = open_delimitation_index(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT vd_number, voting_station, suburb, street, municipality, province FROM delimitation "
+            "WHERE ward = ? ORDER BY voting_station COLLATE NOCASE",
+            (str(ward_number),)
+        ).fetchall()
+    finally:
+        conn.close()
+    keys = ['vd_number', 'voting_station', 'suburb', 'street', 'municipality', 'province']
+    return [dict(zip(keys, row)) for row in rows]
+
+def lookup_voters(id_list, access_token, max_workers=10, db_path=DELIMITATION_DB):
+    """Look up every (id_number, index) pair once and return the successful results.
+
+    Fresh results feed the delimitation index, and IDs the API could not answer
+    fall back to a cached status no older than CACHE_MAX_AGE_DAYS. Cached results
+    have 'cached' set. Without an access token the run is only possible if every
+    ID is cached, otherwise None is returned.
+    """
+    results = []
+    if access_token:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_index = {executor.submit(fetch_voter_data, id_num, i, access_token): i for id_num, i in id_list}
+            for future in as_completed(future_to_index):
+                result = future.result()
+                if result:
+                    result['cached'] = False
+                    results.append(result)
+
+    delimitation_index = {}
+    try:
+        update_delimitation_index(results, db_path)
+        found = {result['id'] for result in results}
+        missing = [(id_num, i) for id_num, i in id_list if id_num not in found]
+        if missing:
+            cached = load_cached_voters(list({id_num for id_num, _ in missing}), db_path)
+            uncached = {id_num for id_num, _ in missing if id_num not in cached}
+            if not access_token and uncached:
+                logging.error(f"{len(uncached)} IDs have no cached status from the last {CACHE_MAX_AGE_DAYS} days; cannot process without the IEC API.")
+                return None
+            cached_results = [{'index': i, 'id': id_num, 'cached': True, **cached[id_num]} for id_num, i in missing if id_num in cached]
+            results.extend(cached_results)
+            logging.info(f"Used cached status for {len(cached_results)} of {len(missing)} IDs without an API result")
+        delimitation_index = load_delimitation_index(db_path)
+    except sqlite3.Error as e:
+        logging.error(f"Error using delimitation index {db_path}: {str(e)}")
+        if not access_token:
+            return None
+
+    return [resolve_voter_geography(result, delimitation_index) for result in results]
+
+def has_cached_status(id_numbers, db_path=DELIMITATION_DB):
+    """Return True if every ID has a cached status, so a run can go ahead without the IEC API."""
+    id_numbers = list(set(id_numbers))
+    try:
+        return len(load_cached_voters(id_numbers, db_path)) == len(id_numbers)
+    except sqlite3.Error as e:
+        logging.error(f"Error using delimitation index {db_path}: {str(e)}")
+        return False
+
+def used_cached_status(results):
+    """Return True if any status in results came from the delimitation cache rather than the IEC API."""
+    return any(result['cached'] for result in results)
+
+def count_unanswered(results, id_list, ward_of):
+    """Count, per ward, the IDs the IEC API gave no answer for. ward_of maps an ID's index to its ward."""
+    answered = {result['index'] for result in results}
+    return Counter(ward_of(index) for _, index in id_list if index not in answered)
+
+def normalize_ward_number(value):
+    """Return a ward number as a plain string (e.g. '93501016'), or '' when missing."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def classify_voter(result, ward_number):
+    """Return the register status of a looked-up voter relative to the given ward."""
+    if result['voting_station'] and not result['bRegistered']:
+        return STATUS_DECEASED
+    if result['bRegistered'] and str(result['ward_id']) == str(ward_number):
+        return STATUS_REGISTERED_IN_WARD
+    if result['bRegistered']:
+        return STATUS_NOT_IN_WARD
+    return STATUS_NOT_REGISTERED
+
+def build_voter_record(result, ward_number, excel_row=None):
+    """Build the attendance register record for a looked-up voter."""
+    name = ""
+    cell_number = ""
+    if excel_row is not None:
+        firstname = str(excel_row.get("Firstname", ""))
+        surname = str(excel_row.get("Surname", ""))
+        name = f"{firstname} {surname}".strip().upper()
+        cell_number = str(excel_row.get("Cell Number", "")).replace(".0", "")
+    return {
+        "NAME": name,
+        "WARD NUMBER": str(ward_number),
+        "ID NUMBER": str(result['id']),
+        "CELL NUMBER": cell_number,
+        "REGISTERED VD": str(result['voting_station']),
+        "VD NUMBER": str(result['vd_number']),
+        "SIGNATURE": "",
+        "NEW CELL NUM": "",
+        "PROVINCE": str(result['province']),
+        "MUNICIPALITY": str(result['municipality']),
+        "CACHED STATUS": result['cached']
+    }
+
+def annotate_row(ws, row, result, ward_number, status):
+    """Write the IEC lookup result and register status into a membership row.
+
+    status may also be NO_MEMBERSHIP_WARD, which is written without a highlight.
+    """
+    address = f"{result['suburb']} {result['street']}".strip()
+    ws.cell(row=row, column=4).value = result['voting_station']
+    ws.cell(row=row, column=5).value = ward_number
+    ws.cell(row=row, column=1).value = result['province']
+    ws.cell(row=row, column=3).value = result['municipality']
+    if ws.cell(row=row, column=14).value in ["N/A", "CENTURION", None]:
+        ws.cell(row=row, column=14).value = address
+
+    ws.cell(row=row, column=26).value = status
+    if status in STATUS_SHEETS:
+        _, color = STATUS_SHEETS[status]
+        ws.cell(row=row, column=26).fill = PatternFill(fgColor=color, fill_type='solid')
+        ws.cell(row=row, column=5).fill = PatternFill(fgColor=color, fill_type='solid')
+        if status == STATUS_DECEASED:
+            ws.cell(row=row, column=8).fill = PatternFill(fgColor=color, fill_type='solid')
+    if result['cached']:
+        if ws.cell(row=1, column=CACHED_STATUS_COLUMN).value is None:
+            ws.cell(row=1, column=CACHED_STATUS_COLUMN).value = "CACHED STATUS"
+        ws.cell(row=row, column=CACHED_STATUS_COLUMN).value = cached_status_note(result)
+
+def cached_status_note(result):
+    """Return the sheet note for a status taken from the cache instead of the IEC API."""
+    return f"Not checked live; cached {time.strftime('%Y-%m-%d', time.localtime(result['cached_at']))}"
+
+def format_id_column(sheet, column_index=8):
+    """Widen the ID Number column and force a 13-digit number format."""
+    sheet.column_dimensions[openpyxl.utils.get_column_letter(column_index)].width = 15
+    for row in range(2, sheet.max_row + 1):
+        sheet.cell(row=row, column=column_index).number_format = '0000000000000'
+
+def read_id_numbers(excel_file, column_index=8):
+    """Read the zero-padded ID numbers of an Excel file without copying or modifying it."""
+    id_numbers = []
+    for value in pd.read_excel(excel_file, header=0).iloc[:, column_index - 1]:
+        if value is None or (isinstance(value, float) and np.isnan(value)) or str(value).strip() == "":
+            continue
+        if isinstance(value, float):
+            value = int(value)
+        id_numbers.append(str(value).strip().rjust(13, '0'))
+    return id_numbers
+
+def collect_id_numbers(ws, column_index=8):
+    """Zero-pad the ID numbers in the worksheet and return (id_number, index) pairs."""
+    id_list = []
+    for j in range(2, ws.max_row + 1):
+        if ws.cell(row=j, column=column_index).value is not None:
+            id_number = str(ws.cell(row=j, column=column_index).value).rjust(13, '0')
+            id_list.append((id_number, j - 2))
+            ws.cell(row=j, column=column_index).value = id_number
+    return id_list
+
+def get_row_values(source_ws, index, ward_number=None, registered_in_ward=False):
+    """Return the cleaned cell values of the given data row in the source worksheet."""
+    values = []
+    for col in range(1, source_ws.max_column + 1):
         value = source_ws.cell(row=index + 2, column=col).value
         if col == 8:  # ID Number column
             value = str(value).rjust(13, '0') if value else ""
-        elif col == 5 and sheet.title == 'RegisteredInWard':
-            value = ward_number if source_ws.cell(row=index + 2, column=col).value is None else source_ws.cell(row=index + 2, column=col).value
+        elif col == 5 and registered_in_ward:
+            value = ward_number if value is None else value
         if value is None or (isinstance(value, float) and np.isnan(value)):
             value = ""
+        values.append(value)
+    return values
+
+def copy_row_to_sheet(sheet, index, source_ws, ward_number=None):
+    """Copy all columns from source worksheet to target sheet for the given row."""
+    values = get_row_values(source_ws, index, ward_number, sheet.title == 'RegisteredInWard')
+    for col, value in enumerate(values, start=1):
         sheet.cell(row=index + 2, column=col).value = value
 
 def remove_empty_rows(sheet):
@@ -138,8 +448,228 @@ def sort_sheet_by_voting_station(sheet, voting_station_col=4):
         for col_idx, value in enumerate(row_data, start=1):
             sheet.cell(row=row_idx, column=col_idx).value = value
 
-def generate_pdf_report(ward_data, not_in_ward_data, ward_number, output_path, municipality):
+# (font name, font size) -> {character: width}
+_char_widths = {}
+
+def string_width(text, font_name, font_size):
+    """pdfmetrics.stringWidth with per-character widths memoised per font and size.
+
+    ReportLab does not kern, so a string's width is the sum of its characters'
+    widths. The memo stays bounded by the character set instead of growing with
+    every distinct name and ID number.
+    """
+    widths = _char_widths.setdefault((font_name, font_size), {})
+    total = 0
+    for char in text:
+        width = widths.get(char)
+        if width is None:
+            width = widths[char] = pdfmetrics.stringWidth(char, font_name, font_size)
+        total += width
+    return total
+
+class ReportTemplate:
+    """Styles, static flowables and column-fitting settings shared by attendance registers.
+
+    Building one is the per-process setup cost of generate_pdf_report(); reuse it
+    across reports in batch runs. Nothing on it changes after construction and
+    each report gets its own flowables, so it can be shared between threads.
+    """
+    page_width = 683
+    font_name = 'Helvetica'
+    font_name_bold = 'Helvetica-Bold'
+    font_size = 8
+    padding = 8
+    headers = ["NUM...", "NAME", "WARD NUMBER", "ID NUMBER", "CELL NUMBER", "REGISTERED VD", "SIGNATURE", "NEW CELL NUM"]
+    max_widths = [50, 160, 80, 110, 90, 120, 80, 80]
+    min_widths = [50, 100, 80, 110, 60, 120, 80, 80]
+    priority_columns = [1, 5]
+
+    def __init__(self, logo_path="RedLogoSquare.png", logo_size=68):
+        styles = getSampleStyleSheet()
+        leading = self.font_size * 1.2
+        self.title_style = ParagraphStyle('RegisterTitle', parent=styles['Title'], fontName='Helvetica-Bold', fontSize=16, leading=18, alignment=1)
+        # The settings the register cells used to end up with once the page footer
+        # had restyled the shared 'Normal' style; fixed here so builds don't interfere
+        self.body_style = ParagraphStyle('RegisterBody', parent=styles['Normal'], fontName='Helvetica-Bold', fontSize=8, leading=12, alignment=0)
+
+        self.header_widths = [string_width(header, self.font_name_bold, self.font_size) + self.padding for header in self.headers]
+        # Columns whose min and max width are equal never need their text measured
+        self.measured_columns = [idx for idx in range(len(self.headers)) if self.min_widths[idx] != self.max_widths[idx]]
+        self.fitted_widths = {}
+
+        self.title_table_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 0, colors.white),
+        ])
+        self.separator_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.black),
+            ('GRID', (0, 0), (-1, -1), 0, colors.transparent),
+        ])
+
+        self.logo_path = None
+        self.logo_size = logo_size
+        if os.path.exists(logo_path):
+            try:
+                # Check the logo loads once here rather than on every report
+                Image(logo_path, width=logo_size, height=logo_size, lazy=0)
+                self.logo_path = logo_path
+            except Exception as e:
+                logging.error(f"Failed to load logo: {str(e)}")
+        self.logo_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 0, colors.white),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ])
+
+        header_frame_style = [
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('LEADING', (0, 0), (-1, -1), 12),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0, colors.white),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ('LEFTPADDING', (0, 0), (-1, -1), 6),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ]
+        self.left_header_style = TableStyle(header_frame_style + [('ALIGN', (0, 0), (-1, -1), 'LEFT')])
+        self.right_header_style = TableStyle(header_frame_style + [('ALIGN', (0, 0), (-1, -1), 'RIGHT')])
+        self.top_frame_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+            ('ALIGN', (2, 0), (2, 0), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0, colors.white),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+        ])
+        self.base_table_style = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTSIZE', (0, 0), (-1, -1), self.font_size),
+            ('LEADING', (0, 0), (-1, -1), leading),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('TOPPADDING', (0, 1), (-1, -1), 4),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ]
+
+    def title_table(self):
+        """Return the FORM A title block. Tables are built per report since a build lays them out in place."""
+        title = Paragraph("FORM A: ATTENDANCE REGISTER", self.title_style)
+        return Table([[title]], colWidths=[self.page_width], rowHeights=[50], style=self.title_table_style)
+
+    def separator_line(self):
+        """Return the black rule under the title."""
+        line = Table([[""]], colWidths=[self.page_width], rowHeights=[2])
+        line.setStyle(self.separator_style)
+        return line
+
+    def logo_table(self):
+        """Return the centred logo block, or None if the logo could not be loaded."""
+        if self.logo_path is None:
+            return None
+        logo_image = Image(self.logo_path, width=self.logo_size, height=self.logo_size)
+        logo_image.hAlign = 'CENTER'
+        logo_image.vAlign = 'TOP'
+        table = Table([[logo_image]], colWidths=[self.page_width], rowHeights=[self.logo_size])
+        table.setStyle(self.logo_style)
+        return table
+
+    def header_table(self, header_data, style):
+        """Return one of the two PROVINCE/WARD header blocks, sized to its text."""
+        width = max(string_width(cell[0], 'Helvetica', 10) + 12 for cell in header_data)
+        table = Table(header_data, colWidths=[width])
+        table.setStyle(style)
+        return table, width
+
+    def fit_column_widths(self, rows):
+        """Fit the register columns to the page for the given (cells, font) rows.
+
+        Columns are clamped to their min/max widths, then the non-priority
+        columns shrink (or the priority columns grow) to fill the page width.
+        """
+        col_max_widths = list(self.header_widths)
+        for cells, font in rows:
+            for idx in self.measured_columns:
+                col_max_widths[idx] = max(col_max_widths[idx], string_width(cells[idx], font if idx == 0 else self.font_name, self.font_size) + self.padding)
+
+        clamped = tuple(min(self.max_widths[idx], max(self.min_widths[idx], width)) for idx, width in enumerate(col_max_widths))
+        if clamped not in self.fitted_widths:
+            self.fitted_widths[clamped] = self._fit_to_page(list(clamped))
+        return self.fitted_widths[clamped]
+
+    def _fit_to_page(self, col_max_widths):
+        """Scale clamped column widths so they add up to the page width."""
+        max_page_width = self.page_width
+        total_width = sum(col_max_widths)
+        if total_width > max_page_width:
+            excess_width = total_width - max_page_width
+            non_priority_columns = [i for i in range(len(self.headers)) if i not in self.priority_columns]
+            total_non_priority_width = sum(col_max_widths[i] for i in non_priority_columns)
+            if total_non_priority_width > 0:
+                scale_factor = (total_non_priority_width - excess_width) / total_non_priority_width
+                if scale_factor > 0:
+                    for i in non_priority_columns:
+                        col_max_widths[i] *= scale_factor
+                else:
+                    scale_factor = max_page_width / total_width
+                    col_max_widths = [w * scale_factor for w in col_max_widths]
+        elif total_width < max_page_width:
+            extra_width = max_page_width - total_width
+            extra_per_priority = extra_width / len(self.priority_columns)
+            for i in self.priority_columns:
+                col_max_widths[i] = min(col_max_widths[i] + extra_per_priority, self.max_widths[i])
+
+        total_width = sum(col_max_widths)
+        if abs(total_width - max_page_width) > 0.01:
+            scale_factor = max_page_width / total_width
+            col_max_widths = [w * scale_factor for w in col_max_widths]
+        return col_max_widths
+
+    def member_cells(self, number, row):
+        """Return the register cells for one member record."""
+        return [
+            str(number),
+            str(row.get("NAME", "")),
+            str(row.get("WARD NUMBER", "")),
+            str(row.get("ID NUMBER", "")),
+            str(row.get("CELL NUMBER", "")).replace(".0", ""),
+            str(row.get("REGISTERED VD", "")),
+            str(row.get("SIGNATURE", "")),
+            str(row.get("NEW CELL NUM", "")).replace(".0", "")
+        ]
+
+    def register_table(self, rows, extra_style_commands):
+        """Build a register table from (cells, font) rows; the header row is prepended."""
+        col_widths = self.fit_column_widths(rows)
+        wrapped_table_data = [[Paragraph(header, self.body_style) for header in self.headers]]
+        for cells, _ in rows:
+            wrapped_table_data.append([Paragraph(text, self.body_style) for text in cells])
+        table = Table(wrapped_table_data, colWidths=col_widths, rowHeights=None)
+        table.setStyle(TableStyle(self.base_table_style + extra_style_commands))
+        return table
+
+_default_report_template = None
+
+def get_report_template():
+    """Return the report template shared by every register generated in this process."""
+    global _default_report_template
+    if _default_report_template is None:
+        _default_report_template = ReportTemplate()
+    return _default_report_template
+
+def generate_pdf_report(ward_data, not_in_ward_data, ward_number, output_path, municipality, template=None):
     """Generate a PDF report for the given ward."""
+    template = template or get_report_template()
     doc = SimpleDocTemplate(
         output_path,
         pagesize=landscape(letter),
@@ -149,32 +679,8 @@ def generate_pdf_report(ward_data, not_in_ward_data, ward_number, output_path, m
         bottomMargin=0.75*inch
     )
     elements = []
-    styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    title_style.fontName = 'Helvetica-Bold'
-    title_style.fontSize = 16
-    title_style.leading = 18
-    title_style.alignment = 1
-
-    header_style = styles['Normal']
-    header_style.fontName = 'Helvetica'
-    header_style.fontSize = 10
-    header_style.leading = 12
-    header_style.alignment = 0
-
-    logo_path = "RedLogoSquare.png"
-    logo_width = 68
-    logo_height = 68
-    logo_image = None
-    if os.path.exists(logo_path):
-        try:
-            logo_image = Image(logo_path, width=logo_width, height=logo_height)
-            logo_image.hAlign = 'CENTER'
-            logo_image.vAlign = 'TOP'
-        except Exception as e:
-            logging.error(f"Failed to load logo: {str(e)}")
+    max_page_width = template.page_width
 
-    title = Paragraph("FORM A: ATTENDANCE REGISTER", title_style)
     total_voters = len(ward_data) + len(not_in_ward_data)
     quorum = total_voters // 2 + 1
     total_voting_stations = len(set(row.get("REGISTERED VD", "") for row in ward_data if row.get("REGISTERED VD", "")))
@@ -186,94 +692,35 @@ def generate_pdf_report(ward_data, not_in_ward_data, ward_number, output_path, m
         [f"QUORUM: {quorum}"],
         ["DATE OF BPA/BGA:"]
     ]
+    cached = sum(1 for row in ward_data + not_in_ward_data if row.get("CACHED STATUS"))
+    if cached:
+        left_header_data.append([f"{cached} STATUSES FROM CACHE, NOT CHECKED LIVE"])
     right_header_data = [
         [f"SUB REGION: {municipality}"],
         [f"WARD: {ward_number}"],
         ["BPA: |_| BGA: |_|"],
         [f"TOTAL NUMBER OF VOTING STATIONS: {total_voting_stations}"]
     ]
+    left_header_table, left_width = template.header_table(left_header_data, template.left_header_style)
+    right_header_table, right_width = template.header_table(right_header_data, template.right_header_style)
 
-    font_name = 'Helvetica'
-    font_size = 10
-    padding = 6
-    left_width = max(pdfmetrics.stringWidth(cell[0], font_name, font_size) + 2 * padding for cell in left_header_data)
-    right_width = max(pdfmetrics.stringWidth(cell[0], font_name, font_size) + 2 * padding for cell in right_header_data)
-
-    left_header_table = Table(left_header_data, colWidths=[left_width])
-    left_header_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('LEADING', (0, 0), (-1, -1), 12),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('GRID', (0, 0), (-1, -1), 0, colors.white),
-        ('TOPPADDING', (0, 0), (-1, -1), 2),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-    ]))
-
-    right_header_table = Table(right_header_data, colWidths=[right_width])
-    right_header_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('LEADING', (0, 0), (-1, -1), 12),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('GRID', (0, 0), (-1, -1), 0, colors.white),
-        ('TOPPADDING', (0, 0), (-1, -1), 2),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-    ]))
-
-    elements.append(Table([[title]], colWidths=[683], rowHeights=[50], style=[
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('ALIGN', (0, 0), (0, 0), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0, colors.white),
-    ]))
-
+    elements.append(template.title_table())
     elements.append(Spacer(1, 6))
-    separator_line = Table([[""]], colWidths=[683], rowHeights=[2])
-    separator_line.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.black),
-        ('GRID', (0, 0), (-1, -1), 0, colors.transparent),
-    ]))
-    elements.append(separator_line)
+    elements.append(template.separator_line())
     elements.append(Spacer(1, 6))
 
-    if logo_image:
-        logo_table = Table([[logo_image]], colWidths=[683], rowHeights=[logo_height])
-        logo_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 0, colors.white),
-            ('TOPPADDING', (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ]))
+    logo_table = template.logo_table()
+    if logo_table:
         elements.append(logo_table)
         elements.append(Spacer(1, 2))
 
-    max_page_width = 683
     middle_width = max_page_width - left_width - right_width
     top_frame_data = [[left_header_table, "", right_header_table]]
     top_frame_table = Table(top_frame_data, colWidths=[left_width, middle_width, right_width], rowHeights=[None])
-    top_frame_table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (2, 0), (2, 0), 'RIGHT'),
-        ('GRID', (0, 0), (-1, -1), 0, colors.white),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-    ]))
+    top_frame_table.setStyle(template.top_frame_style)
     elements.append(top_frame_table)
     elements.append(Spacer(1, 8))
 
-    headers = ["NUM...", "NAME", "WARD NUMBER", "ID NUMBER", "CELL NUMBER", "REGISTERED VD", "SIGNATURE", "NEW CELL NUM"]
     grouped_data = {}
     for row in ward_data:
         voting_station = str(row.get("REGISTERED VD", ""))
@@ -282,161 +729,34 @@ def generate_pdf_report(ward_data, not_in_ward_data, ward_number, output_path, m
         grouped_data[voting_station].append(row)
 
     sorted_voting_stations = sorted(grouped_data.keys(), key=lambda x: x.lower() if x else "")
-    table_data = [headers]
-    all_text_for_width = [headers]
-    group_header_rows = []
-    voter_count_rows = []
-    current_row = 1
-
+    blank = ["", "", "", "", "", "", ""]
+    rows = []
+    style_commands = []
     for voting_station in sorted_voting_stations:
         vd_number = grouped_data[voting_station][0].get("VD NUMBER", "") if grouped_data[voting_station] else ""
-        group_header = [f"Voting Station: {voting_station or 'Unknown'} (VDNumber: {vd_number})", "", "", "", "", "", "", ""]
-        table_data.append(group_header)
-        all_text_for_width.append(group_header)
-        group_header_rows.append(current_row)
-        current_row += 1
+        rows.append(([f"Voting Station: {voting_station or 'Unknown'} (VDNumber: {vd_number})"] + blank, 'Arial-Black'))
+        style_commands.extend([
+            ('BACKGROUND', (0, len(rows)), (-1, len(rows)), colors.lightgrey),
+            ('SPAN', (0, len(rows)), (-1, len(rows))),
+            ('VALIGN', (0, len(rows)), (-1, -1), 'TOP'),
+        ])
 
         for i, row in enumerate(grouped_data[voting_station], start=1):
-            cell_number = str(row.get("CELL NUMBER", "")).replace(".0", "")
-            new_cell_num = str(row.get("NEW CELL NUM", "")).replace(".0", "")
-            name = str(row.get("NAME", ""))
-            row_data = [
-                str(i),
-                name,
-                str(row.get("WARD NUMBER", "")),
-                str(row.get("ID NUMBER", "")),
-                cell_number,
-                str(row.get("REGISTERED VD", "")),
-                str(row.get("SIGNATURE", "")),
-                new_cell_num
-            ]
-            table_data.append(row_data)
-            all_text_for_width.append(row_data)
-            current_row += 1
+            rows.append((template.member_cells(i, row), template.font_name))
 
         voter_count = len(grouped_data[voting_station])
-        voter_count_row = [f"Total Voters in {voting_station or 'Unknown'}: {voter_count}", "", "", "", "", "", "", ""]
-        table_data.append(voter_count_row)
-        all_text_for_width.append(voter_count_row)
-        voter_count_rows.append(current_row)
-        current_row += 1
-
-    font_name = 'Helvetica'
-    font_name_bold = 'Helvetica-Bold'
-    font_size = 8
-    max_page_width = 683
-    padding = 8
-    max_widths = [50, 160, 80, 110, 90, 120, 80, 80]
-    min_widths = [50, 100, 80, 110, 60, 120, 80, 80]
-    col_max_widths = [0] * len(headers)
-
-    for row in all_text_for_width:
-        for idx, cell in enumerate(row):
-            text = str(cell)
-            font = 'Arial-Black' if (idx == 0 and row[0].startswith("Voting Station:")) else \
-                   font_name_bold if (idx == 0 and row[0].startswith("Total Voters in") or row == headers) else font_name
-            text_width = pdfmetrics.stringWidth(text, font, font_size) + padding
-            col_max_widths[idx] = max(col_max_widths[idx], text_width)
-
-    for idx in range(len(headers)):
-        col_max_widths[idx] = min(max_widths[idx], max(min_widths[idx], col_max_widths[idx]))
-
-    priority_columns = [1, 5]
-    total_width = sum(col_max_widths)
-    if total_width > max_page_width:
-        excess_width = total_width - max_page_width
-        non_priority_columns = [i for i in range(len(headers)) if i not in priority_columns]
-        total_non_priority_width = sum(col_max_widths[i] for i in non_priority_columns)
-        if total_non_priority_width > 0:
-            scale_factor = (total_non_priority_width - excess_width) / total_non_priority_width
-            if scale_factor > 0:
-                for i in non_priority_columns:
-                    col_max_widths[i] *= scale_factor
-            else:
-                scale_factor = max_page_width / total_width
-                col_max_widths = [w * scale_factor for w in col_max_widths]
-    elif total_width < max_page_width:
-        extra_width = max_page_width - total_width
-        extra_per_priority = extra_width / len(priority_columns)
-        for i in priority_columns:
-            col_max_widths[i] = min(col_max_widths[i] + extra_per_priority, max_widths[i])
-
-    total_width = sum(col_max_widths)
-    if abs(total_width - max_page_width) > 0.01:
-        scale_factor = max_page_width / total_width
-        col_max_widths = [w * scale_factor for w in col_max_widths]
-
-    cell_style = styles['Normal']
-    cell_style.fontName = font_name
-    cell_style.fontSize = font_size
-    cell_style.leading = font_size * 1.2
-    cell_style.alignment = 0
-
-    header_style = styles['Normal']
-    header_style.fontName = font_name_bold
-    header_style.fontSize = font_size
-    header_style.leading = font_size * 1.2
-    header_style.alignment = 0
-
-    group_header_style = styles['Normal']
-    group_header_style.fontName = 'Arial-Black'
-    group_header_style.fontSize = font_size
-    group_header_style.leading = font_size * 1.2
-    group_header_style.alignment = 0
-
-    voter_count_style = styles['Normal']
-    voter_count_style.fontName = font_name_bold
-    voter_count_style.fontSize = font_size
-    voter_count_style.leading = font_size * 1.2
-    voter_count_style.alignment = 0
-
-    wrapped_table_data = []
-    for row_idx, row in enumerate(table_data):
-        wrapped_row = []
-        for col_idx, cell in enumerate(row):
-            text = str(cell)
-            style = (header_style if row_idx == 0 else
-                     group_header_style if row_idx in group_header_rows else
-                     voter_count_style if row_idx in voter_count_rows else
-                     cell_style)
-            p = Paragraph(text, style)
-            wrapped_row.append(p)
-        wrapped_table_data.append(wrapped_row)
-
-    table = Table(wrapped_table_data, colWidths=col_max_widths, rowHeights=None)
-    style_commands = [
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTSIZE', (0, 0), (-1, -1), font_size),
-        ('LEADING', (0, 0), (-1, -1), font_size * 1.2),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 1), (-1, -1), 4),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-    ]
-
-    for row_idx in group_header_rows:
+        rows.append(([f"Total Voters in {voting_station or 'Unknown'}: {voter_count}"] + blank, template.font_name_bold))
         style_commands.extend([
-            ('BACKGROUND', (0, row_idx), (-1, row_idx), colors.lightgrey),
-            ('SPAN', (0, row_idx), (-1, row_idx)),
-            ('VALIGN', (0, row_idx), (-1, -1), 'TOP'),
+            ('BACKGROUND', (0, len(rows)), (-1, len(rows)), colors.yellow),
+            ('SPAN', (0, len(rows)), (-1, len(rows))),
+            ('VALIGN', (0, len(rows)), (-1, -1), 'TOP'),
         ])
 
-    for row_idx in voter_count_rows:
-        style_commands.extend([
-            ('BACKGROUND', (0, row_idx), (-1, row_idx), colors.yellow),
-            ('SPAN', (0, row_idx), (-1, row_idx)),
-            ('VALIGN', (0, row_idx), (-1, -1), 'TOP'),
-        ])
-
-    table.setStyle(TableStyle(style_commands))
-    elements.append(table)
+    elements.append(template.register_table(rows, style_commands))
 
     if not_in_ward_data:
         elements.append(Spacer(1, 12))
-        not_in_ward_title = Paragraph("Not Registered In Ward Data", group_header_style)
+        not_in_ward_title = Paragraph("Not Registered In Ward Data", template.body_style)
         not_in_ward_title_table = Table([[not_in_ward_title]], colWidths=[max_page_width], rowHeights=[None])
         not_in_ward_title_table.setStyle(TableStyle([
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -448,113 +768,23 @@ def generate_pdf_report(ward_data, not_in_ward_data, ward_number, output_path, m
         elements.append(not_in_ward_title_table)
         elements.append(Spacer(1, 4))
 
-        not_in_ward_table_data = [headers]
-        not_in_ward_all_text_for_width = [headers]
-        not_in_ward_header_row = [0]
-
-        for i, row in enumerate(not_in_ward_data, start=1):
-            cell_number = str(row.get("CELL NUMBER", "")).replace(".0", "")
-            new_cell_num = str(row.get("NEW CELL NUM", "")).replace(".0", "")
-            name = str(row.get("NAME", ""))
-            row_data = [
-                str(i),
-                name,
-                str(row.get("WARD NUMBER", "")),
-                str(row.get("ID NUMBER", "")),
-                cell_number,
-                str(row.get("REGISTERED VD", "")),
-                str(row.get("SIGNATURE", "")),
-                new_cell_num
-            ]
-            not_in_ward_table_data.append(row_data)
-            not_in_ward_all_text_for_width.append(row_data)
-
-        total_not_in_ward = len(not_in_ward_data)
-        total_row = [f"Total Not Registered in Ward Voters: {total_not_in_ward}", "", "", "", "", "", "", ""]
-        not_in_ward_table_data.append(total_row)
-        not_in_ward_all_text_for_width.append(total_row)
-        not_in_ward_voter_count_row = len(not_in_ward_table_data) - 1
-
-        not_in_ward_col_max_widths = [0] * len(headers)
-        for row in not_in_ward_all_text_for_width:
-            for idx, cell in enumerate(row):
-                text = str(cell)
-                font = font_name_bold if (idx == 0 and (row[0].startswith("Total Not Registered in Ward Voters") or row == headers)) else font_name
-                text_width = pdfmetrics.stringWidth(text, font, font_size) + padding
-                not_in_ward_col_max_widths[idx] = max(not_in_ward_col_max_widths[idx], text_width)
-
-        for idx in range(len(headers)):
-            not_in_ward_col_max_widths[idx] = min(max_widths[idx], max(min_widths[idx], not_in_ward_col_max_widths[idx]))
-
-        total_width = sum(not_in_ward_col_max_widths)
-        if total_width > max_page_width:
-            excess_width = total_width - max_page_width
-            non_priority_columns = [i for i in range(len(headers)) if i not in priority_columns]
-            total_non_priority_width = sum(not_in_ward_col_max_widths[i] for i in non_priority_columns)
-            if total_non_priority_width > 0:
-                scale_factor = (total_non_priority_width - excess_width) / total_non_priority_width
-                if scale_factor > 0:
-                    for i in non_priority_columns:
-                        not_in_ward_col_max_widths[i] *= scale_factor
-                else:
-                    scale_factor = max_page_width / total_width
-                    not_in_ward_col_max_widths = [w * scale_factor for w in not_in_ward_col_max_widths]
-        elif total_width < max_page_width:
-            extra_width = max_page_width - total_width
-            extra_per_priority = extra_width / len(priority_columns)
-            for i in priority_columns:
-                not_in_ward_col_max_widths[i] = min(not_in_ward_col_max_widths[i] + extra_per_priority, max_widths[i])
-
-        total_width = sum(not_in_ward_col_max_widths)
-        if abs(total_width - max_page_width) > 0.01:
-            scale_factor = max_page_width / total_width
-            not_in_ward_col_max_widths = [w * scale_factor for w in not_in_ward_col_max_widths]
-
-        wrapped_not_in_ward_table_data = []
-        for row_idx, row in enumerate(not_in_ward_table_data):
-            wrapped_row = []
-            for col_idx, cell in enumerate(row):
-                text = str(cell)
-                style = (header_style if row_idx in not_in_ward_header_row else
-                         voter_count_style if row_idx == not_in_ward_voter_count_row else
-                         cell_style)
-                p = Paragraph(text, style)
-                wrapped_row.append(p)
-            wrapped_not_in_ward_table_data.append(wrapped_row)
-
-        not_in_ward_table = Table(wrapped_not_in_ward_table_data, colWidths=not_in_ward_col_max_widths, rowHeights=None)
-        not_in_ward_style_commands = [
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTSIZE', (0, 0), (-1, -1), font_size),
-            ('LEADING', (0, 0), (-1, -1), font_size * 1.2),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 4),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('BOX', (0, 0), (-1, -1), 1, colors.black),
-            ('BACKGROUND', (0, not_in_ward_voter_count_row), (-1, not_in_ward_voter_count_row), colors.yellow),
-            ('SPAN', (0, not_in_ward_voter_count_row), (-1, not_in_ward_voter_count_row)),
-            ('VALIGN', (0, not_in_ward_voter_count_row), (-1, -1), 'TOP'),
-        ]
-
-        not_in_ward_table.setStyle(TableStyle(not_in_ward_style_commands))
-        elements.append(not_in_ward_table)
+        not_in_ward_rows = [(template.member_cells(i, row), template.font_name) for i, row in enumerate(not_in_ward_data, start=1)]
+        not_in_ward_rows.append(([f"Total Not Registered in Ward Voters: {len(not_in_ward_data)}"] + blank, template.font_name_bold))
+        total_row = len(not_in_ward_rows)
+        elements.append(template.register_table(not_in_ward_rows, [
+            ('BACKGROUND', (0, total_row), (-1, total_row), colors.yellow),
+            ('SPAN', (0, total_row), (-1, total_row)),
+            ('VALIGN', (0, total_row), (-1, -1), 'TOP'),
+        ]))
 
     def on_page(canvas, doc):
         canvas.saveState()
-        footer_style = styles['Normal']
-        footer_style.fontName = 'Helvetica'
-        footer_style.fontSize = 10
-        footer_style.leading = 12
-        footer_style.alignment = 0
         sub_region_text = f"SUB REGION: {municipality}"
         canvas.setFont('Helvetica', 10)
         canvas.setFillColor(colors.black)
         canvas.drawString(doc.leftMargin, doc.bottomMargin - 10, sub_region_text)
         ward_text = f"WARD: {ward_number}"
-        ward_text_width = pdfmetrics.stringWidth(ward_text, 'Helvetica', 10)
+        ward_text_width = string_width(ward_text, 'Helvetica', 10)
         canvas.drawString(doc.leftMargin + doc.width - ward_text_width, doc.bottomMargin - 10, ward_text)
         page_number_text = f"Page {canvas.getPageNumber()}"
         canvas.drawCentredString(doc.leftMargin + doc.width / 2, doc.bottomMargin - 10, page_number_text)
@@ -563,6 +793,158 @@ def generate_pdf_report(ward_data, not_in_ward_data, ward_number, output_path, m
     doc.build(elements, onFirstPage=on_page, onLaterPages=on_page)
     logging.info(f"Generated PDF report: {output_path}")
 
+def print_ward_summary(input_name, ward_number, counts, voting_station_counts, cached=0):
+    """Print the per-ward classification totals for a processed file."""
+    total_processed = sum(counts.values())
+    print(f"\nResults for {input_name} (Ward {ward_number}):")
+    print(f"Total IDs Processed: {total_processed}")
+    print(f"Registered in Ward: {counts[STATUS_REGISTERED_IN_WARD]}")
+    print(f"Not Registered in Ward: {counts[STATUS_NOT_IN_WARD]}")
+    print(f"Not Registered Voters: {counts[STATUS_NOT_REGISTERED]}")
+    print(f"Deceased: {counts[STATUS_DECEASED]}")
+    if cached:
+        print(f"Statuses from cache, not checked live: {cached}")
+    if voting_station_counts:
+        print("Voting Station Counts:")
+        for vs, count in voting_station_counts.items():
+            print(f"  {vs}: {count} voters")
+
+def open_rollup_index(db_path=ROLLUP_DB):
+    """Open the regional rollup index, creating its tables if needed."""
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS ward_rollup (
+            ward TEXT PRIMARY KEY,
+            province TEXT,
+            municipality TEXT,
+            registered_in_ward INTEGER NOT NULL,
+            not_in_ward INTEGER NOT NULL,
+            not_registered INTEGER NOT NULL,
+            deceased INTEGER NOT NULL,
+            total_membership INTEGER NOT NULL,
+            quorum INTEGER NOT NULL,
+            voting_stations INTEGER NOT NULL,
+            source_file TEXT,
+            updated_at REAL NOT NULL,
+            unanswered INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS voting_station_rollup (
+            ward TEXT NOT NULL,
+            vd_number TEXT NOT NULL,
+            voting_station TEXT,
+            province TEXT,
+            municipality TEXT,
+            registered_in_ward INTEGER NOT NULL,
+            PRIMARY KEY (ward, vd_number)
+        );
+        CREATE INDEX IF NOT EXISTS idx_ward_rollup_region ON ward_rollup (province, municipality);
+        CREATE INDEX IF NOT EXISTS idx_voting_station_rollup_region ON voting_station_rollup (province, municipality);
+        CREATE INDEX IF NOT EXISTS idx_voting_station_rollup_vd ON voting_station_rollup (vd_number);
+    """)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(ward_rollup)")]
+    if 'unanswered' not in columns:
+        with conn:
+            conn.execute("ALTER TABLE ward_rollup ADD COLUMN unanswered INTEGER NOT NULL DEFAULT 0")
+    return conn
+
+def ward_region(registered_in_ward_data, regions):
+    """Return the (province, municipality) of a ward.
+
+    Registered-in-ward members decide it when there are any. Otherwise the most
+    common region of all the ward's classified members is used.
+    """
+    for row in registered_in_ward_data:
+        if row.get("PROVINCE") and row.get("MUNICIPALITY"):
+            return row["PROVINCE"], row["MUNICIPALITY"]
+    if regions:
+        return regions.most_common(1)[0][0]
+    return "Unknown", "Unknown"
+
+def update_rollup_index(ward_number, counts, registered_in_ward_data, not_registered_in_ward_data, regions, source_file, unanswered=0, db_path=ROLLUP_DB):
+    """Replace one ward's aggregates in the rollup index with the results of this run.
+
+    regions counts the (province, municipality) of every classified member of the ward.
+    unanswered is the number of the ward's IDs the IEC API gave no answer for, so
+    partial runs can be told apart from complete ones.
+    """
+    ward_number = str(ward_number)
+    province, municipality = ward_region(registered_in_ward_data, regions)
+    total_membership = len(registered_in_ward_data) + len(not_registered_in_ward_data)
+    quorum = total_membership // 2 + 1
+
+    stations = Counter((row.get("VD NUMBER", ""), row.get("REGISTERED VD", "")) for row in registered_in_ward_data)
+    station_rows = [
+        (ward_number, vd_number, voting_station, province, municipality, count)
+        for (vd_number, voting_station), count in stations.items()
+    ]
+    total_voting_stations = len(set(voting_station for _, voting_station in stations if voting_station))
+
+    try:
+        conn = open_rollup_index(db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ward_rollup (ward, province, municipality, registered_in_ward, not_in_ward, "
+                    "not_registered, deceased, total_membership, quorum, voting_stations, source_file, updated_at, unanswered) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ward_number, province, municipality,
+                     counts[STATUS_REGISTERED_IN_WARD], counts[STATUS_NOT_IN_WARD],
+                     counts[STATUS_NOT_REGISTERED], counts[STATUS_DECEASED],
+                     total_membership, quorum, total_voting_stations, source_file, time.time(), unanswered)
+                )
+                conn.execute("DELETE FROM voting_station_rollup WHERE ward = ?", (ward_number,))
+                conn.executemany("INSERT INTO voting_station_rollup VALUES (?, ?, ?, ?, ?, ?)", station_rows)
+        finally:
+            conn.close()
+        logging.info(f"Updated rollup index for ward {ward_number}: {db_path}")
+    except sqlite3.Error as e:
+        logging.error(f"Error updating rollup index for ward {ward_number}: {str(e)}")
+
+def get_regional_totals(province=None, municipality=None, ward=None, db_path=ROLLUP_DB):
+    """Return summed ward aggregates for a province, municipality or ward from the rollup index.
+
+    The quorum is the sum of the per-ward quorums, since each ward meets separately.
+    """
+    filters = [("province", province), ("municipality", municipality), ("ward", ward)]
+    clauses = [f"{column} = ?" for column, value in filters if value is not None]
+    params = [str(value) for _, value in filters if value is not None]
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = open_rollup_index(db_path)
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(registered_in_ward), 0), COALESCE(SUM(not_in_ward), 0), "
+            "COALESCE(SUM(not_registered), 0), COALESCE(SUM(deceased), 0), "
+            "COALESCE(SUM(total_membership), 0), COALESCE(SUM(quorum), 0), COALESCE(SUM(voting_stations), 0), "
+            "COALESCE(SUM(unanswered), 0) "
+            f"FROM ward_rollup{where}",
+            params
+        ).fetchone()
+    finally:
+        conn.close()
+    keys = ['wards', 'registered_in_ward', 'not_in_ward', 'not_registered', 'deceased', 'total_membership', 'quorum', 'voting_stations', 'unanswered']
+    return dict(zip(keys, row))
+
+def get_voting_station_totals(province=None, municipality=None, ward=None, vd_number=None, db_path=ROLLUP_DB):
+    """Return registered-in-ward counts per voting district from the rollup index."""
+    filters = [("province", province), ("municipality", municipality), ("ward", ward), ("vd_number", vd_number)]
+    clauses = [f"{column} = ?" for column, value in filters if value is not None]
+    params = [str(value) for _, value in filters if value is not None]
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = open_rollup_index(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT province, municipality, ward, vd_number, voting_station, registered_in_ward "
+            f"FROM voting_station_rollup{where} ORDER BY province, municipality, ward, vd_number",
+            params
+        ).fetchall()
+    finally:
+        conn.close()
+    keys = ['province', 'municipality', 'ward', 'vd_number', 'voting_station', 'registered_in_ward']
+    return [dict(zip(keys, row)) for row in rows]
+
 def process_excel_file(excel_file, ward_number):
     """Process a single Excel file and generate output files and PDF report."""
     column_index = 8  # ID Number column
@@ -570,10 +952,8 @@ def process_excel_file(excel_file, ward_number):
     os.makedirs(output_dir, exist_ok=True)
     start_time = time.time()
 
-    counter_false = 0
-    counter_true = 0
-    deceased_counter = 0
-    not_in_ward_counter = 0
+    counts = Counter()
+    regions = Counter()
     registered_in_ward_data = []
     not_registered_in_ward_data = []
     voting_station_counts = Counter()
@@ -583,12 +963,22 @@ def process_excel_file(excel_file, ward_number):
         print(f"Excel file {excel_file} does not exist.")
         return
 
+    try:
+        if not validate_ward_number(ward_number):
+            logging.warning(f"Ward {ward_number} is not in the delimitation index; check WARD_NUMBER.")
+            print(f"Warning: ward {ward_number} is not in the delimitation index; check WARD_NUMBER.")
+    except sqlite3.Error as e:
+        logging.error(f"Error validating ward {ward_number}: {str(e)}")
+
     try:
         access_token = get_access_token()
     except Exception as e:
         logging.error(f"Failed to obtain access token: {str(e)}")
-        print(f"Error obtaining access token: {str(e)}")
-        return
+        if not has_cached_status(read_id_numbers(excel_file, column_index)):
+            print(f"Error obtaining access token: {str(e)}")
+            return
+        print(f"Error obtaining access token: {str(e)}. Every ID has a cached status; continuing offline.")
+        access_token = None
 
     excel_input_file = os.path.basename(excel_file)
     output_file_path = os.path.join(output_dir, excel_input_file)
@@ -620,122 +1010,57 @@ def process_excel_file(excel_file, ward_number):
     }
     df = df.rename(columns=column_mapping)
 
-    for sheet_name in ['NotRegisteredVoter', 'RegisteredInWard', 'Deceased', 'NotRegisteredInWard']:
+    for sheet_name, _ in STATUS_SHEETS.values():
         if sheet_name not in wb.sheetnames:
             wb.create_sheet(sheet_name)
 
-    ws1 = wb['NotRegisteredVoter']
-    ws2 = wb['RegisteredInWard']
-    ws3 = wb['Deceased']
-    ws4 = wb['NotRegisteredInWard']
+    status_ws = {status: wb[sheet_name] for status, (sheet_name, _) in STATUS_SHEETS.items()}
 
-    if ws.max_row >= 1:
-        for col in range(1, ws.max_column + 1):
-            value = ws.cell(row=1, column=col).value
-            for sheet in [ws1, ws2, ws3, ws4]:
-                sheet.cell(row=1, column=col).value = value
-
-    for sheet in [ws, ws1, ws2, ws3, ws4]:
-        sheet.column_dimensions[openpyxl.utils.get_column_letter(column_index)].width = 15
-        for row in range(2, sheet.max_row + 1):
-            cell = sheet.cell(row=row, column=column_index)
-            cell.number_format = '0000000000000'
-
-    id_list = []
-    for j in range(2, ws.max_row + 1):
-        if ws.cell(row=j, column=column_index).value is not None:
-            id_number = str(ws.cell(row=j, column=column_index).value).rjust(13, '0')
-            id_list.append((id_number, j - 2))
-            ws.cell(row=j, column=column_index).value = id_number
+    for sheet in [ws] + list(status_ws.values()):
+        format_id_column(sheet, column_index)
 
-    results = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_index = {executor.submit(fetch_voter_data, id_num, i, access_token): i for id_num, i in id_list}
-        for future in as_completed(future_to_index):
-            result = future.result()
-            if result:
-                results.append(result)
+    id_list = collect_id_numbers(ws, column_index)
+    results = lookup_voters(id_list, access_token)
+    if results is None:
+        print("Cannot process without the IEC API: not every ID has a cached status.")
+        return
+    used_cache = used_cached_status(results)
+    unanswered = len(id_list) - len(results)
 
     for result in results:
         i = result['index']
-        row = i + 2
-        address = f"{result['suburb']} {result['street']}".strip()
         ward_number_to_use = result['ward_id'] if result['ward_id'] is not None else ward_number
-        ws.cell(row=row, column=4).value = result['voting_station']
-        ws.cell(row=row, column=5).value = ward_number_to_use
-        ws.cell(row=row, column=1).value = result['province']
-        ws.cell(row=row, column=3).value = result['municipality']
-        if ws.cell(row=row, column=14).value in ["N/A", "CENTURION", None]:
-            ws.cell(row=row, column=14).value = address
+        status = classify_voter(result, ward_number)
+        annotate_row(ws, i + 2, result, ward_number_to_use, status)
 
         try:
             excel_row = df.iloc[i]
-            firstname = str(excel_row.get("Firstname", ""))
-            surname = str(excel_row.get("Surname", ""))
-            name = f"{firstname} {surname}".strip().upper()
-            cell_number = str(excel_row.get("Cell Number", "")).replace(".0", "")
-            voter_record = {
-                "NAME": name if name else "",
-                "WARD NUMBER": str(ward_number_to_use),
-                "ID NUMBER": str(result['id']),
-                "CELL NUMBER": cell_number if cell_number else "",
-                "REGISTERED VD": str(result['voting_station']),
-                "VD NUMBER": str(result['vd_number']),
-                "SIGNATURE": "",
-                "NEW CELL NUM": "",
-                "PROVINCE": str(result['province']),
-                "MUNICIPALITY": str(result['municipality'])
-            }
         except IndexError:
-            voter_record = {
-                "NAME": "",
-                "WARD NUMBER": str(ward_number_to_use),
-                "ID NUMBER": str(result['id']),
-                "CELL NUMBER": "",
-                "REGISTERED VD": str(result['voting_station']),
-                "VD NUMBER": str(result['vd_number']),
-                "SIGNATURE": "",
-                "NEW CELL NUM": "",
-                "PROVINCE": str(result['province']),
-                "MUNICIPALITY": str(result['municipality'])
-            }
-
-        if result['voting_station'] and not result['bRegistered']:
-            deceased_counter += 1
-            ws.cell(row=row, column=26).value = "DECEASED"
-            ws.cell(row=row, column=26).fill = PatternFill(fgColor='ffff00', fill_type='solid')
-            ws.cell(row=row, column=8).fill = PatternFill(fgColor='ffff00', fill_type='solid')
-            ws.cell(row=row, column=5).fill = PatternFill(fgColor='ffff00', fill_type='solid')
-            copy_row_to_sheet(ws3, i, ws, ward_number)
-        elif result['bRegistered'] and str(result['ward_id']) == str(ward_number):
-            counter_true += 1
-            ws.cell(row=row, column=26).value = "Registered In Ward"
-            ws.cell(row=row, column=26).fill = PatternFill(fgColor='00ff00', fill_type='solid')
-            ws.cell(row=row, column=5).fill = PatternFill(fgColor='00ff00', fill_type='solid')
+            excel_row = None
+        voter_record = build_voter_record(result, ward_number_to_use, excel_row)
+
+        counts[status] += 1
+        if result['province'] and result['municipality']:
+            regions[(result['province'], result['municipality'])] += 1
+        copy_row_to_sheet(status_ws[status], i, ws, ward_number)
+        if status == STATUS_REGISTERED_IN_WARD:
             registered_in_ward_data.append(voter_record)
-            copy_row_to_sheet(ws2, i, ws, ward_number)
             voting_station_counts[result['voting_station']] += 1
-        elif result['bRegistered'] and str(result['ward_id']) != str(ward_number):
-            not_in_ward_counter += 1
-            ws.cell(row=row, column=26).value = "Not Registered In Ward"
-            ws.cell(row=row, column=26).fill = PatternFill(fgColor='0000FF', fill_type='solid')
-            ws.cell(row=row, column=5).fill = PatternFill(fgColor='0000FF', fill_type='solid')
+        elif status == STATUS_NOT_IN_WARD:
             not_registered_in_ward_data.append(voter_record)
-            copy_row_to_sheet(ws4, i, ws, ward_number)
-        else:
-            counter_false += 1
-            ws.cell(row=row, column=26).value = "Not Registered Voter"
-            ws.cell(row=row, column=26).fill = PatternFill(fgColor='ff0000', fill_type='solid')
-            ws.cell(row=row, column=5).fill = PatternFill(fgColor='ff0000', fill_type='solid')
-            copy_row_to_sheet(ws1, i, ws, ward_number)
 
-    remove_empty_rows(ws1)
-    remove_empty_rows(ws2)
-    remove_empty_rows(ws3)
-    remove_empty_rows(ws4)
+    # Copy the header after annotation so it includes the cached status column
+    if ws.max_row >= 1:
+        for col in range(1, ws.max_column + 1):
+            value = ws.cell(row=1, column=col).value
+            for sheet in status_ws.values():
+                sheet.cell(row=1, column=col).value = value
+
+    for sheet in status_ws.values():
+        remove_empty_rows(sheet)
 
-    sort_sheet_by_voting_station(ws2)
-    sort_sheet_by_voting_station(ws4)
+    sort_sheet_by_voting_station(status_ws[STATUS_REGISTERED_IN_WARD])
+    sort_sheet_by_voting_station(status_ws[STATUS_NOT_IN_WARD])
 
     try:
         wb.save(output_file_path)
@@ -746,17 +1071,11 @@ def process_excel_file(excel_file, ward_number):
         print(f"Error saving {output_file_path}: {str(e)}")
         return
 
-    total_processed = counter_true + counter_false + deceased_counter + not_in_ward_counter
-    print(f"\nResults for {excel_input_file} (Ward {ward_number}):")
-    print(f"Total IDs Processed: {total_processed}")
-    print(f"Registered in Ward: {counter_true}")
-    print(f"Not Registered in Ward: {not_in_ward_counter}")
-    print(f"Not Registered Voters: {counter_false}")
-    print(f"Deceased: {deceased_counter}")
-    if voting_station_counts:
-        print("Voting Station Counts:")
-        for vs, count in voting_station_counts.items():
-            print(f"  {vs}: {count} voters")
+    print_ward_summary(excel_input_file, ward_number, counts, voting_station_counts, sum(1 for result in results if result['cached']))
+    if not used_cache:
+        update_rollup_index(ward_number, counts, registered_in_ward_data, not_registered_in_ward_data, regions, excel_input_file, unanswered)
+    else:
+        print("Rollup index not updated: some statuses came from the cache rather than the IEC API.")
 
     end_time = time.time()
     print(f"\nProcessing completed in {end_time - start_time:.2f} seconds.")
@@ -767,5 +1086,408 @@ def process_excel_file(excel_file, ward_number):
     generate_pdf_report(registered_in_ward_data, not_registered_in_ward_data, ward_number, output_pdf, municipality)
     print(f"Generated PDF report: {output_pdf}")
 
+def write_unassigned_sheet(wb, header, rows, column_index=8):
+    """Write members without a membership ward to an Unassigned sheet for correction."""
+    if 'Unassigned' not in wb.sheetnames:
+        wb.create_sheet('Unassigned')
+    unassigned_ws = wb['Unassigned']
+    for col, value in enumerate(header, start=1):
+        unassigned_ws.cell(row=1, column=col).value = value
+    for row_idx, row_values in enumerate(rows, start=2):
+        for col, value in enumerate(row_values, start=1):
+            unassigned_ws.cell(row=row_idx, column=col).value = value
+    format_id_column(unassigned_ws, column_index)
+
+def new_ward_outputs(source_sheet):
+    """Return an empty per-ward accumulator for region and extract processing."""
+    return {
+        'sheet_rows': {source_sheet: []} | {sheet_name: [] for sheet_name, _ in STATUS_SHEETS.values()},
+        'registered_in_ward_data': [],
+        'not_registered_in_ward_data': [],
+        'counts': Counter(),
+        'voting_station_counts': Counter(),
+        'regions': Counter(),
+        'cached': 0,
+    }
+
+def add_ward_member(ward, source_sheet, status, result, voter_record, member_values=None, status_values=None):
+    """Record one classified member in a per-ward accumulator.
+
+    Row values are only needed when the ward workbook is written; pass None to skip them.
+    """
+    sheet_name, _ = STATUS_SHEETS[status]
+    ward['counts'][status] += 1
+    if result['cached']:
+        ward['cached'] += 1
+    if result['province'] and result['municipality']:
+        ward['regions'][(result['province'], result['municipality'])] += 1
+    if member_values is not None:
+        ward['sheet_rows'][source_sheet].append(member_values)
+    if status_values is not None:
+        ward['sheet_rows'][sheet_name].append(status_values)
+    if status == STATUS_REGISTERED_IN_WARD:
+        ward['registered_in_ward_data'].append(voter_record)
+        ward['voting_station_counts'][result['voting_station']] += 1
+    elif status == STATUS_NOT_IN_WARD:
+        ward['not_registered_in_ward_data'].append(voter_record)
+
+def write_ward_outputs(ward_number, header, sheet_rows, registered_in_ward_data, not_registered_in_ward_data, output_dir, file_stem, write_workbook=True):
+    """Write the workbook and attendance register for one ward of a region file.
+
+    sheet_rows maps sheet names to lists of row values. Runs in a worker process,
+    so everything it needs is passed in as plain data.
+    """
+    output_pdf = os.path.join(output_dir, f"Ward_{ward_number}_Attendance_Register.pdf")
+    municipality = next((row.get("MUNICIPALITY", "Unknown") for row in registered_in_ward_data if row.get("MUNICIPALITY", "Unknown") != "Unknown"), "Unknown")
+    generate_pdf_report(registered_in_ward_data, not_registered_in_ward_data, ward_number, output_pdf, municipality)
+    if not write_workbook:
+        return None, output_pdf
+
+    column_index = 8  # ID Number column
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for sheet_name, rows in sheet_rows.items():
+        sheet = wb.create_sheet(sheet_name)
+        for col, value in enumerate(header, start=1):
+            sheet.cell(row=1, column=col).value = value
+        for row_idx, row_values in enumerate(rows, start=2):
+            for col, value in enumerate(row_values, start=1):
+                sheet.cell(row=row_idx, column=col).value = value
+        format_id_column(sheet, column_index)
+
+    sort_sheet_by_voting_station(wb['RegisteredInWard'])
+    sort_sheet_by_voting_station(wb['NotRegisteredInWard'])
+
+    output_file_path = os.path.join(output_dir, f"Ward_{ward_number}_{file_stem}.xlsx")
+    wb.save(output_file_path)
+    logging.info(f"Saved ward file: {output_file_path}")
+    return output_file_path, output_pdf
+
+def write_all_ward_outputs(wards, header, output_dir, file_stem, max_workers=None, write_workbook=True):
+    """Write the outputs of every ward in parallel worker processes."""
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        future_to_ward = {
+            executor.submit(
+                write_ward_outputs, ward_number, header, ward['sheet_rows'],
+                ward['registered_in_ward_data'], ward['not_registered_in_ward_data'],
+                output_dir, file_stem, write_workbook
+            ): ward_number
+            for ward_number, ward in wards.items()
+        }
+        for future in as_completed(future_to_ward):
+            ward_number = future_to_ward[future]
+            try:
+                ward_file, ward_pdf = future.result()
+                if ward_file:
+                    print(f"Saved ward file: {ward_file}")
+                print(f"Generated PDF report: {ward_pdf}")
+            except Exception as e:
+                logging.error(f"Error writing outputs for ward {ward_number}: {str(e)}")
+                print(f"Error writing outputs for ward {ward_number}: {str(e)}")
+
+def process_region_file(excel_file, max_workers=None):
+    """Process a municipality or region-wide Excel file in a single lookup pass.
+
+    Each member is classified against the ward in their own membership ward
+    column (column 5), and a workbook and attendance register is written per ward.
+    """
+    column_index = 8  # ID Number column
+    ward_column = 5  # Membership Ward Number column
+    output_dir = "VOTER_REG_STATUS/ProcessedFiles"
+    os.makedirs(output_dir, exist_ok=True)
+    start_time = time.time()
+
+    if not os.path.exists(excel_file):
+        logging.error(f"Excel file {excel_file} does not exist.")
+        print(f"Excel file {excel_file} does not exist.")
+        return
+
+    try:
+        access_token = get_access_token()
+    except Exception as e:
+        logging.error(f"Failed to obtain access token: {str(e)}")
+        if not has_cached_status(read_id_numbers(excel_file, column_index)):
+            print(f"Error obtaining access token: {str(e)}")
+            return
+        print(f"Error obtaining access token: {str(e)}. Every ID has a cached status; continuing offline.")
+        access_token = None
+
+    excel_input_file = os.path.basename(excel_file)
+    output_file_path = os.path.join(output_dir, excel_input_file)
+    try:
+        shutil.copy(excel_file, output_file_path)
+        logging.info(f"Copied file to: {output_file_path}")
+        print(f"Copied file to: {output_file_path}")
+    except (shutil.Error, OSError) as e:
+        logging.error(f"Error copying file {excel_input_file}: {str(e)}")
+        print(f"Error copying file {excel_input_file}: {str(e)}")
+        return
+
+    try:
+        wb = openpyxl.load_workbook(output_file_path)
+        ws = wb.active
+    except Exception as e:
+        logging.error(f"Error loading copied file {output_file_path}: {str(e)}")
+        print(f"Error loading copied file {output_file_path}: {str(e)}")
+        return
+
+    df = pd.read_excel(excel_file, header=0)
+    df = df.fillna("")
+
+    format_id_column(ws, column_index)
+
+    # Read the membership wards before the lookup results overwrite column 5
+    member_wards = {row - 2: normalize_ward_number(ws.cell(row=row, column=ward_column).value) for row in range(2, ws.max_row + 1)}
+    id_list = collect_id_numbers(ws, column_index)
+    results = lookup_voters(id_list, access_token)
+    if results is None:
+        print("Cannot process without the IEC API: not every ID has a cached status.")
+        return
+    used_cache = used_cached_status(results)
+    unanswered = count_unanswered(results, id_list, lambda index: member_wards.get(index, ""))
+
+    wards = {}
+    unassigned_rows = []
+    for result in sorted(results, key=lambda r: r['index']):
+        i = result['index']
+        member_ward = member_wards.get(i, "")
+        if not member_ward:
+            # Their ward is unknown rather than different, so they get no register status
+            logging.warning(f"ID {result['id']} at index {i} has no membership ward; adding it to the Unassigned sheet.")
+            annotate_row(ws, i + 2, result, member_ward, NO_MEMBERSHIP_WARD)
+            unassigned_rows.append(get_row_values(ws, i))
+            continue
+
+        ward_number_to_use = result['ward_id'] if result['ward_id'] is not None else member_ward
+        status = classify_voter(result, member_ward)
+        annotate_row(ws, i + 2, result, ward_number_to_use, status)
+        row_values = get_row_values(ws, i)
+
+        try:
+            excel_row = df.iloc[i]
+        except IndexError:
+            excel_row = None
+        voter_record = build_voter_record(result, ward_number_to_use, excel_row)
+
+        ward = wards.setdefault(member_ward, new_ward_outputs(ws.title))
+        add_ward_member(ward, ws.title, status, result, voter_record, row_values, row_values)
+
+    # Read the header after annotation so it includes the cached status column
+    header = [ws.cell(row=1, column=col).value for col in range(1, ws.max_column + 1)]
+    if unassigned_rows:
+        write_unassigned_sheet(wb, header, unassigned_rows, column_index)
+
+    try:
+        wb.save(output_file_path)
+        logging.info(f"Saved processed file: {output_file_path}")
+        print(f"Saved processed file: {output_file_path}")
+    except (PermissionError, OSError) as e:
+        logging.error(f"Error saving {output_file_path}: {str(e)}")
+        print(f"Error saving {output_file_path}: {str(e)}")
+        return
+
+    file_stem = os.path.splitext(excel_input_file)[0]
+    write_all_ward_outputs(wards, header, output_dir, file_stem, max_workers)
+
+    for ward_number in sorted(wards):
+        ward = wards[ward_number]
+        print_ward_summary(excel_input_file, ward_number, ward['counts'], ward['voting_station_counts'], ward['cached'])
+        if not used_cache:
+            update_rollup_index(ward_number, ward['counts'], ward['registered_in_ward_data'], ward['not_registered_in_ward_data'], ward['regions'], excel_input_file, unanswered[ward_number])
+    if used_cache:
+        print("\nRollup index not updated: some statuses came from the cache rather than the IEC API.")
+    if unassigned_rows:
+        print(f"\nIDs without a membership ward: {len(unassigned_rows)} (see the Unassigned sheet in {output_file_path})")
+
+    end_time = time.time()
+    print(f"\nProcessed {len(wards)} wards in {end_time - start_time:.2f} seconds.")
+
+def iter_membership_extract(extract_file, chunksize=EXTRACT_CHUNKSIZE):
+    """Yield a CSV or Parquet membership extract as chunks of text columns.
+
+    Every column is read as text so ID and cell numbers keep their leading zeros.
+    The column layout matches the membership workbook: ward in column 5, ID in column 8.
+    """
+    extension = os.path.splitext(extract_file)[1].lower()
+    if extension == '.csv':
+        yield from pd.read_csv(extract_file, dtype=str, keep_default_na=False, chunksize=chunksize)
+    elif extension == '.parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet extracts requires pyarrow (pip install pyarrow).")
+        for batch in pq.ParquetFile(extract_file).iter_batches(batch_size=chunksize):
+            batch = batch.cast(pa.schema([(field.name, pa.string()) for field in batch.schema]))
+            yield batch.to_pandas().fillna("")
+    else:
+        raise ValueError(f"Unsupported membership extract format: {extension}")
+
+def normalize_number_text(text):
+    """Undo float formatting of a whole number read as text ('93501016.0' -> '93501016')."""
+    text = text.strip()
+    if text and not text.isdigit():
+        try:
+            value = float(text)
+        except ValueError:
+            return text
+        if value.is_integer():
+            return str(int(value))
+    return text
+
+def annotate_values(values, result, ward_number, status):
+    """List counterpart of annotate_row for rows that are not in a worksheet."""
+    values = list(values) + [""] * (26 - len(values))
+    values[3] = result['voting_station']
+    values[4] = ward_number
+    values[0] = result['province']
+    values[2] = result['municipality']
+    if values[13] in ["N/A", "CENTURION", ""]:
+        values[13] = f"{result['suburb']} {result['street']}".strip()
+    values[25] = status
+    if result['cached']:
+        values += [""] * (CACHED_STATUS_COLUMN - len(values))
+        values[CACHED_STATUS_COLUMN - 1] = cached_status_note(result)
+    return values
+
+def process_membership_extract(extract_file, ward_number=None, write_workbook=False, max_workers=None):
+    """Process a CSV or Parquet membership extract through the ward register pipeline.
+
+    With ward_number set, every member is classified against that ward; otherwise
+    against their own membership ward column. Attendance registers are always
+    generated, per-ward workbooks only when write_workbook is True.
+    """
+    column_index = 8  # ID Number column
+    ward_column = 5  # Membership Ward Number column
+    output_dir = "VOTER_REG_STATUS/ProcessedFiles"
+    os.makedirs(output_dir, exist_ok=True)
+    start_time = time.time()
+
+    if not os.path.exists(extract_file):
+        logging.error(f"Membership extract {extract_file} does not exist.")
+        print(f"Membership extract {extract_file} does not exist.")
+        return
+
+    # Keep only what the pipeline needs per member; full rows only for the workbook
+    header = None
+    members = []
+    id_list = []
+    try:
+        for chunk in iter_membership_extract(extract_file):
+            if header is None:
+                header = list(chunk.columns)
+                if len(header) < column_index:
+                    break
+            id_numbers = chunk.iloc[:, column_index - 1].map(normalize_number_text)
+            member_wards = chunk.iloc[:, ward_column - 1].map(normalize_number_text)
+            fields = chunk.reindex(columns=['Firstname', 'Surname', 'Cell Number'], fill_value="").to_dict('records')
+            if write_workbook:
+                chunk.iloc[:, column_index - 1] = id_numbers.str.rjust(13, '0').where(id_numbers != "", "")
+                chunk.iloc[:, ward_column - 1] = member_wards
+                rows = chunk.values.tolist()
+            else:
+                rows = [None] * len(chunk)
+            for id_number, member_ward, member_fields, row_values in zip(id_numbers, member_wards, fields, rows):
+                if id_number:
+                    id_list.append((id_number.rjust(13, '0'), len(members)))
+                members.append((member_ward, member_fields, row_values))
+    except (ImportError, ValueError, OSError) as e:
+        logging.error(f"Error reading membership extract {extract_file}: {str(e)}")
+        print(f"Error reading membership extract {extract_file}: {str(e)}")
+        return
+    logging.info(f"Read {len(members)} rows from {extract_file} in {time.time() - start_time:.2f} seconds")
+
+    if header is None or len(header) < column_index:
+        logging.error(f"Membership extract {extract_file} is empty or has fewer than {column_index} columns.")
+        print(f"Membership extract {extract_file} is empty or has fewer than {column_index} columns.")
+        return
+
+    try:
+        access_token = get_access_token()
+    except Exception as e:
+        logging.error(f"Failed to obtain access token: {str(e)}")
+        if not has_cached_status([id_number for id_number, _ in id_list]):
+            print(f"Error obtaining access token: {str(e)}")
+            return
+        print(f"Error obtaining access token: {str(e)}. Every ID has a cached status; continuing offline.")
+        access_token = None
+
+    results = lookup_voters(id_list, access_token)
+    if results is None:
+        print("Cannot process without the IEC API: not every ID has a cached status.")
+        return
+    used_cache = used_cached_status(results)
+    if ward_number is not None:
+        unanswered = count_unanswered(results, id_list, lambda index: normalize_ward_number(ward_number))
+    else:
+        unanswered = count_unanswered(results, id_list, lambda index: members[index][0])
+
+    source_sheet = 'Members'
+    # Rows are padded to the status column (26) by annotate_values; pad the header to match
+    header = header + [""] * (26 - len(header))
+    header[25] = header[25] or "Status"
+    if any(result['cached'] for result in results):
+        header += [""] * (CACHED_STATUS_COLUMN - len(header))
+        header[CACHED_STATUS_COLUMN - 1] = header[CACHED_STATUS_COLUMN - 1] or "CACHED STATUS"
+    wards = {}
+    unassigned = 0
+    unassigned_rows = []
+    for result in sorted(results, key=lambda r: r['index']):
+        i = result['index']
+        member_ward, excel_row, row_values = members[i]
+        if ward_number is not None:
+            member_ward = normalize_ward_number(ward_number)
+        if not member_ward:
+            logging.warning(f"ID {result['id']} at index {i} has no membership ward; not on any register.")
+            unassigned += 1
+            if write_workbook:
+                unassigned_rows.append(annotate_values(row_values, result, member_ward, NO_MEMBERSHIP_WARD))
+            continue
+
+        ward_number_to_use = result['ward_id'] if result['ward_id'] is not None else member_ward
+        status = classify_voter(result, member_ward)
+        voter_record = build_voter_record(result, ward_number_to_use, excel_row)
+        member_values = annotate_values(row_values, result, ward_number_to_use, status) if write_workbook else None
+
+        ward = wards.setdefault(member_ward, new_ward_outputs(source_sheet))
+        add_ward_member(ward, source_sheet, status, result, voter_record, member_values, member_values)
+
+    file_stem = os.path.splitext(os.path.basename(extract_file))[0]
+    write_all_ward_outputs(wards, header, output_dir, file_stem, max_workers, write_workbook)
+
+    unassigned_file_path = os.path.join(output_dir, f"Unassigned_{file_stem}.xlsx")
+    if unassigned_rows:
+        wb = openpyxl.Workbook()
+        wb.remove(wb.active)
+        write_unassigned_sheet(wb, header, unassigned_rows, column_index)
+        try:
+            wb.save(unassigned_file_path)
+            logging.info(f"Saved unassigned members file: {unassigned_file_path}")
+            print(f"Saved unassigned members file: {unassigned_file_path}")
+        except (PermissionError, OSError) as e:
+            logging.error(f"Error saving {unassigned_file_path}: {str(e)}")
+            print(f"Error saving {unassigned_file_path}: {str(e)}")
+
+    input_name = os.path.basename(extract_file)
+    for member_ward in sorted(wards):
+        ward = wards[member_ward]
+        print_ward_summary(input_name, member_ward, ward['counts'], ward['voting_station_counts'], ward['cached'])
+        if not used_cache:
+            update_rollup_index(member_ward, ward['counts'], ward['registered_in_ward_data'], ward['not_registered_in_ward_data'], ward['regions'], input_name, unanswered[member_ward])
+    if used_cache:
+        print("\nRollup index not updated: some statuses came from the cache rather than the IEC API.")
+    if unassigned_rows:
+        print(f"\nIDs without a membership ward: {unassigned} (see the Unassigned sheet in {unassigned_file_path})")
+    elif unassigned:
+        print(f"\nIDs without a membership ward: {unassigned}")
+
+    end_time = time.time()
+    print(f"\nProcessed {len(wards)} wards in {end_time - start_time:.2f} seconds.")
+
 if __name__ == "__main__":
-    process_excel_file(EXCEL_FILE, WARD_NUMBER)
\ No newline at end of file
+    if os.path.splitext(EXCEL_FILE)[1].lower() in ('.csv', '.parquet'):
+        process_membership_extract(EXCEL_FILE, None if REGION_MODE else WARD_NUMBER)
+    elif REGION_MODE:
+        process_region_file(EXCEL_FILE)
+    else:
+        process_excel_file(EXCEL_FILE, WARD_NUMBER)